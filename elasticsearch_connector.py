@@ -23,15 +23,95 @@ from phantom.action_result import ActionResult
 from elasticsearch_consts import *
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import gzip
 import json
 import imp
+import re
 import sys
+import time
+import threading
 
 import elasticsearch_parser
 
+# orjson is a C implementation that parses/serializes several times faster than the stdlib
+# module, which matters for multi-MB hits payloads, fall back to stdlib json when unavailable
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# ijson allows parsing a large _search response incrementally, so the hits array does not have
+# to be materialized in full just to throw most of it away, optional like orjson above
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def _stream_parse_search(stream, max_hits):
+    """ Incrementally parse a _search response read from stream, building the usual response
+    tree but keeping at most max_hits entries of the hits.hits array """
+
+    result = None
+    stack = []
+    key = None
+    kept = 0
+    at_cap = False
+
+    def attach(value):
+        top = stack[-1]
+        if isinstance(top, list):
+            top.append(value)
+        else:
+            top[key] = value
+
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+
+        # Once the cap is hit, drain the remaining hit entries without building them
+        if at_cap and prefix.startswith('hits.hits.item'):
+            continue
+
+        if event == 'map_key':
+            key = value
+        elif event in ('start_map', 'start_array'):
+            container = {} if event == 'start_map' else []
+            if stack:
+                attach(container)
+            else:
+                result = container
+            stack.append(container)
+        elif event in ('end_map', 'end_array'):
+            stack.pop()
+            if event == 'end_map' and prefix == 'hits.hits.item':
+                kept += 1
+                at_cap = kept >= max_hits
+        elif stack:
+            attach(value)
+        else:
+            result = value
+
+    return result
+
+
 MODULE_NAME = 'custom_parser'
 HANDLER_NAME = 'handle_request'
 
+# Braces confuse the platform's message formatting, scrub them in one C-level pass instead of
+# chained str.replace calls that each walk and copy the whole string
+_BRACE_TRANS = str.maketrans({'{': ' ', '}': ' '})
+
+# Error bodies beyond this many characters add nothing to the logs
+_ERR_DETAIL_MAX_LEN = 4096
+
 
 class PhantomDebugWriter():
     def __init__(self, this):
@@ -49,6 +129,22 @@ class ElasticsearchConnector(BaseConnector):
     REQUIRED_INGESTION_FIELDS = ["ingest_index",
                                  "ingest_query"]
 
+    # Index and type names are lowercase alphanumerics plus a few separators, with wildcards and
+    # comma-separated lists allowed. Validating up front fails bad input without an es round-trip.
+    _NAME_RE = re.compile(r'^[a-z0-9_\.\*][a-z0-9_\-\.\*,]*$')
+
+    # The methods _make_rest_call accepts, one frozenset probe replaces the old per-call
+    # getattr(requests, method) module lookup and its unreachable None check
+    _METHOD_SET = frozenset(('get', 'post', 'put', 'delete', 'head', 'patch'))
+
+    # The index/mapping payloads grow with the cluster and rarely change between action runs, so
+    # they are cached per asset url and endpoint for a short while. Class level since Phantom
+    # creates a fresh connector object per action, the lock covers concurrent action runs in the
+    # same process. Elasticsearch does not emit ETag validators, hence a TTL instead of
+    # conditional requests.
+    _mapping_cache = {}
+    _mapping_cache_lock = threading.Lock()
+
     def __init__(self):
         """ """
 
@@ -59,11 +155,13 @@ class ElasticsearchConnector(BaseConnector):
         self._username = None
         self._password = None
         self._key = None
+        self._session = None
+        self._verify = None
 
         # Call the BaseConnectors init first
         super(ElasticsearchConnector, self).__init__()
 
-    def initialize(self):
+    def initialize(self) -> bool:
         """ Called once for every action, all member initializations occur here"""
 
         config = self.get_config()
@@ -79,68 +177,132 @@ class ElasticsearchConnector(BaseConnector):
         # The headers, initialize them here once and use them for all other REST calls
         self._headers = {
             'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',  # requests decompresses transparently
             'Content-Type': 'application/json'
         }
 
         self._username = config.get(phantom.APP_JSON_USERNAME)
         self._password = config.get(phantom.APP_JSON_PASSWORD)
+        self._verify = config[phantom.APP_JSON_VERIFY]
 
         if self._username and self._password:
             self._auth_method = True
 
+        # Log the auth mode once per action run, save_progress is an IPC to the platform and has
+        # no business on the per-call path. Running without credentials is the configured default
+        # for open installations, so only the authenticated case is worth a line.
+        if self._auth_method:
+            self.save_progress('Using authentication')
+
+        # Pool size is configurable so it can be matched to the search thread pool capacity of
+        # the Elasticsearch cluster, the default of 20 covers typical concurrent playbook runs
+        try:
+            max_connections = int(config.get(ELASTICSEARCH_JSON_MAX_CONNECTIONS, ELASTICSEARCH_DEFAULT_POOL_SIZE))
+        except Exception:
+            return self.set_status(phantom.APP_ERROR, "Asset config 'max_connections' must be an integer")
+
+        # A single session is used for all the REST calls made during an action run, the pooled
+        # keep-alive connections save a TCP+TLS handshake on every call after the first one.
+        # Retries back off and cover 429 (es rejecting on a full thread pool) besides gateway errors
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_connections,
+            pool_maxsize=max_connections,
+            max_retries=Retry(total=3, connect=3, read=2, backoff_factor=0.3,
+                              status_forcelist=[429, 502, 503, 504],
+                              allowed_methods=frozenset(['GET', 'POST', 'PUT'])))
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers.update(self._headers)
+
+        if self._auth_method:
+            self._session.auth = (self._username, self._password)
+
         return phantom.APP_SUCCESS
 
-    def _make_rest_call(self, endpoint, action_result, headers={}, params=None, data=None, method='get'):
-        """ Function that makes the REST call to the device, generic function that can be called from various action
-        handlers """
+    def finalize(self) -> bool:
+        """ Called by the BaseConnector once all the actions are complete, cleanup member objects here"""
 
-        # Get the config
-        config = self.get_config()
+        if self._session is not None:
+            self._session.close()
 
-        # Create the headers
-        headers.update(self._headers)
+        return phantom.APP_SUCCESS
 
-        resp_json = None
+    def _make_rest_call(self, endpoint: str, action_result, headers: dict = None, params: dict = None,
+                        data=None, method: str = 'get', max_hits: int = None):
+        """ Function that makes the REST call to the device, generic function that can be called from various action
+        handlers. The data can be a json string (sent as-is) or an object that is serialized here once. If max_hits
+        is given and ijson is available, large search responses are parsed incrementally with the hits array capped
+        at that many entries. """
 
-        # get or post or put, whatever the caller asked us to use, if not specified the default will be 'get'
-        request_func = getattr(requests, method)
+        resp_json = None
 
         # handle the error in case the caller specified a non-existant method
-        if not request_func:
-            return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_API_UNSUPPORTED_METHOD, method=method)
+        if method not in self._METHOD_SET:
+            return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_API_UNSUPPORTED_METHOD.format(
+                method=method)), resp_json
 
-        if self._auth_method:
-            self.save_progress('Using authentication')
-        else:
-            self.save_progress('Not using any authentication, since either the password or username not specified')
+        # Serialize the body here only if the caller did not already do so, the common headers
+        # live on the session so there is nothing to merge per call
+        if data is not None and not isinstance(data, str):
+            data = _json_dumps(data)
+
+        # Compress bodies worth compressing, repetitive json shrinks 5-10x and level 1 is already
+        # near the best ratio for it at a fraction of the cpu. es decompresses by default
+        if data is not None and len(data) > ELASTICSEARCH_GZIP_MIN_BYTES:
+            data = gzip.compress(data.encode(), compresslevel=1)
+            headers = dict(headers) if headers else {}
+            headers['Content-Encoding'] = 'gzip'
 
-        # Make the call
+        stream = max_hits is not None and ijson is not None
+
+        # Make the call, the session already carries the auth and the common headers
         try:
-            r = request_func(self._base_url + endpoint,  # The complete url is made up of the base_url, and the endpoint
-                             auth=(self._username, self._password) if self._auth_method else None,
-                             data=json.dumps(data) if data else None,
-                             # the data, converted to json string format if present, else just set to None
-                             headers=headers,  # The headers to send in the HTTP call
-                             verify=config[phantom.APP_JSON_VERIFY],  # should cert verification be carried out?
-                             params=params)  # uri parameters if any
+            r = self._session.request(method,
+                                      self._base_url + endpoint,  # The complete url is made up of the base_url, and the endpoint
+                                      data=data,  # the body, already a json or ndjson string at this point, if present
+                                      headers=headers,  # Extra headers to send in the HTTP call, if any
+                                      verify=self._verify,  # should cert verification be carried out?
+                                      params=params,  # uri parameters if any
+                                      stream=stream)  # don't pre-read the body if it is going to be stream-parsed
         except Exception as e:
             return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_SERVER_CONNECTION, e), resp_json
 
-        if hasattr(action_result, 'add_debug_data'):
+        # Stream-parse large successful responses, small ones (and errors) fall through to the
+        # normal full parse below, which reads the body off the open stream
+        if stream and 200 <= r.status_code <= 399:
+            content_length = r.headers.get('Content-Length')
+            if not content_length or int(content_length) > ELASTICSEARCH_STREAM_MIN_BYTES:
+                r.raw.decode_content = True
+                try:
+                    return phantom.APP_SUCCESS, _stream_parse_search(r.raw, max_hits)
+                except Exception as e:
+                    msg_string = ELASTICSEARCH_ERR_JSON_PARSE.format(raw_text='<streamed response>')
+                    return action_result.set_status(phantom.APP_ERROR, msg_string, e), resp_json
+
+        # One getattr instead of a hasattr probe plus three lookups, and a single call with the
+        # merged dict instead of one per field
+        add_debug_data = getattr(action_result, 'add_debug_data', None)
+
+        if add_debug_data is not None:
             if r is not None:
-                action_result.add_debug_data({'r_text': r.text})
-                action_result.add_debug_data({'r_headers': r.headers})
-                action_result.add_debug_data({'r_status_code': r.status_code})
+                # Decode explicitly, r.text falls back to charset detection over the whole body
+                # when the server omits the charset, which es does
+                add_debug_data({
+                    'r_status_code': r.status_code,
+                    'r_text': r.content.decode('utf-8', 'replace'),
+                    'r_headers': dict(r.headers)})
             else:
-                action_result.add_debug_data({'r_text': 'r is None'})
+                add_debug_data({'r_text': 'r is None'})
 
         # Try a json parse, since most REST API's give back the data in json, if the device does not return JSONs,
         # then need to implement parsing them some other manner
         try:
-            resp_json = r.json()
+            resp_json = _json_loads(r.content)
         except Exception as e:
-            # r.text is guaranteed to be NON None, it will be empty, but not None
-            msg_string = ELASTICSEARCH_ERR_JSON_PARSE.format(raw_text=r.text.replace('{', ' ').replace('}', ' '))
+            # r.content is guaranteed to be NON None, it will be empty, but not None
+            raw_text = r.content[:_ERR_DETAIL_MAX_LEN].decode('utf-8', 'replace')
+            msg_string = ELASTICSEARCH_ERR_JSON_PARSE.format(raw_text=raw_text.translate(_BRACE_TRANS))
             return action_result.set_status(phantom.APP_ERROR, msg_string, e), resp_json
 
         # Handle any special HTTP error codes here, many devices return an HTTP error code like 204. The requests module treats these as error,
@@ -156,29 +318,39 @@ class ElasticsearchConnector(BaseConnector):
         # Failure
         action_result.add_data(resp_json)
 
-        details = json.dumps(resp_json).replace('{', '').replace('}', '')
+        details = json.dumps(resp_json)[:_ERR_DETAIL_MAX_LEN].translate(_BRACE_TRANS)
 
         return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_FROM_SERVER.format(status=r.status_code,
                                                                                                 detail=details)), resp_json
 
-    def _test_connectivity(self, param):
+    def _test_connectivity(self, param: dict) -> bool:
         """ Function that handles the test connectivity action, it is much simpler than other action handlers."""
 
         # Connectivity
         self.save_progress(phantom.APP_PROG_CONNECTING_TO_ELLIPSES, self._host)
 
-        # set the endpoint
-        endpoint = '/_cluster/health'
+        # The root endpoint answers with the cluster name and version at O(1) cost, unlike
+        # _cluster/health which makes the master enumerate every shard just to say 'up'
+        endpoint = '/'
 
         # Action result to represent the call
         action_result = ActionResult()
 
         # Progress message, since it is test connectivity, it pays to be verbose
-        self.save_progress(ELASTICSEARCH_MSG_CLUSTER_HEALTH)
+        self.save_progress(ELASTICSEARCH_MSG_CLUSTER_INFO)
 
         # Make the rest endpoint call
         ret_val, response = self._make_rest_call(endpoint, action_result)
 
+        if phantom.is_success(ret_val):
+            cluster_name = response.get('cluster_name')
+            version = response.get('version', {}).get('number')
+            if cluster_name and version:
+                self.save_progress(ELASTICSEARCH_MSG_CLUSTER_INFO_DETAILS.format(cluster_name=cluster_name,
+                                                                                 version=version))
+            else:
+                ret_val = action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_NOT_ES)
+
         # Process errors
         if phantom.is_fail(ret_val):
             # Dump error messages in the log
@@ -196,7 +368,7 @@ class ElasticsearchConnector(BaseConnector):
         # Set the status of the connector result
         return self.set_status_save_progress(phantom.APP_SUCCESS, ELASTICSEARCH_SUCC_CONNECTIVITY_TEST)
 
-    def _run_query(self, param):
+    def _run_query(self, param: dict) -> bool:
         """ Action handler for the 'run query' action"""
 
         # This is an action that needs to be represented by the ActionResult object
@@ -209,25 +381,50 @@ class ElasticsearchConnector(BaseConnector):
         query_string = param[ELASTICSEARCH_JSON_QUERY]
 
         try:
-            query_json = json.loads(query_string)
+            _json_loads(query_string)
         except Exception as e:
             return action_result.set_status(phantom.APP_ERROR, "Unable to load query json. Error: {0}".format(str(e)))
 
+        index = param[ELASTICSEARCH_JSON_INDEX]
         es_type = param.get(ELASTICSEARCH_JSON_TYPE, '_doc')
-        endpoint = "/{0}/{1}/_search".format(param[ELASTICSEARCH_JSON_INDEX], es_type)
+
+        if not self._NAME_RE.match(index):
+            return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_INVALID_NAME.format(
+                name=ELASTICSEARCH_JSON_INDEX))
+
+        if not self._NAME_RE.match(es_type):
+            return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_INVALID_NAME.format(
+                name=ELASTICSEARCH_JSON_TYPE))
+
+        endpoint = f"/{index}/{es_type}/_search"
 
         routing = param.get(ELASTICSEARCH_JSON_ROUTING)
 
-        params = None
+        params = {'routing': routing} if routing else None
+
+        # With summary_only the server filters the response down to the summary fields and the
+        # hit ids before serializing, so the bulk of the payload never crosses the wire
+        if param.get(ELASTICSEARCH_JSON_SUMMARY_ONLY, False):
+            params = params or {}
+            params['filter_path'] = 'hits.total,timed_out,hits.hits._id'
 
-        if routing:
-            params = {'routing': routing}
+        max_hits = param.get(ELASTICSEARCH_JSON_MAX_HITS)
+
+        if max_hits is not None:
+            try:
+                max_hits = int(max_hits)
+                if max_hits < 0:
+                    raise ValueError
+            except Exception:
+                return action_result.set_status(phantom.APP_ERROR,
+                                                "Parameter 'max_hits' must be a non-negative integer")
 
         # Connectivity
         self.save_progress(phantom.APP_PROG_CONNECTING_TO_ELLIPSES, self._host)
 
         # Make the rest endpoint call
-        ret_val, response = self._make_rest_call(endpoint, action_result, data=query_json, params=params, method='post')
+        ret_val, response = self._make_rest_call(endpoint, action_result, data=query_string, params=params,
+                                                 method='post', max_hits=max_hits)
 
         # Process errors
         if phantom.is_fail(ret_val):
@@ -236,6 +433,13 @@ class ElasticsearchConnector(BaseConnector):
             self.debug_print(action_result.get_message())
             return action_result.get_status()
 
+        # Enforce the cap even when the response was parsed in full, i.e. without ijson or when
+        # the body was small enough that streaming was not worth it
+        if max_hits is not None:
+            hits = response.get('hits', {}).get('hits')
+            if hits and len(hits) > max_hits:
+                response['hits']['hits'] = hits[:max_hits]
+
         action_result.update_summary({
             ELASTICSEARCH_JSON_TOTAL_HITS: response.get('hits', {}).get('total', 0),
             ELASTICSEARCH_JSON_TIMED_OUT: response.get('timed_out', False)})
@@ -245,43 +449,181 @@ class ElasticsearchConnector(BaseConnector):
         # Set the Status
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _get_config(self, param):
+    def _run_queries(self, param: dict) -> bool:
+        """ Action handler for the 'run query' action when a batch of queries is supplied"""
 
         action_result = self.add_action_result(ActionResult(dict(param)))
 
+        queries = param[ELASTICSEARCH_JSON_QUERIES]
+
+        # The playbook can pass the batch either as a list or as a json string
+        if not isinstance(queries, list):
+            try:
+                queries = _json_loads(queries)
+            except Exception as e:
+                return action_result.set_status(phantom.APP_ERROR,
+                                                "Unable to load queries json. Error: {0}".format(str(e)))
+
+        if not isinstance(queries, list):
+            return action_result.set_status(phantom.APP_ERROR, "Parameter 'queries' must be a list of queries")
+
+        index = param[ELASTICSEARCH_JSON_INDEX]
+        es_type = param.get(ELASTICSEARCH_JSON_TYPE, '_doc')
+
+        if not self._NAME_RE.match(index):
+            return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_INVALID_NAME.format(
+                name=ELASTICSEARCH_JSON_INDEX))
+
+        if not self._NAME_RE.match(es_type):
+            return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_INVALID_NAME.format(
+                name=ELASTICSEARCH_JSON_TYPE))
+
+        routing = param.get(ELASTICSEARCH_JSON_ROUTING)
+
+        max_hits = param.get(ELASTICSEARCH_JSON_MAX_HITS)
+
+        if max_hits is not None:
+            try:
+                max_hits = int(max_hits)
+                if max_hits < 0:
+                    raise ValueError
+            except Exception:
+                return action_result.set_status(phantom.APP_ERROR,
+                                                "Parameter 'max_hits' must be a non-negative integer")
+
+        # Index and type ride on the endpoint like the single-query path builds /{index}/{type}/_search,
+        # es 7 rejects 'type' as an msearch header key, so the shared header only carries the routing
+        header_line = _json_dumps({'routing': routing} if routing else {})
+
+        # Build the ndjson body, a header line followed by a query line per search, so the whole
+        # batch travels in one HTTP round-trip instead of one per query
+        lines = []
+        for query_json in queries:
+            lines.append(header_line)
+            lines.append(query_json if isinstance(query_json, str) else _json_dumps(query_json))
+        body = '\n'.join(lines) + '\n'
+
+        params = None
+
+        # Same server-side filtering as the single-query path, scoped under the responses[] wrapper.
+        # error and status must stay in the path list, an msearch with a failed query still answers
+        # HTTP 200 and filtering them out would report the failure as an empty success (and drop
+        # the entry from responses[] entirely, misaligning it with the submitted queries)
+        if param.get(ELASTICSEARCH_JSON_SUMMARY_ONLY, False):
+            params = {'filter_path': 'responses.hits.total,responses.timed_out,responses.hits.hits._id,'
+                                     'responses.error,responses.status'}
+
         # Connectivity
         self.save_progress(phantom.APP_PROG_CONNECTING_TO_ELLIPSES, self._host)
 
         # Make the rest endpoint call
-        ret_val, response = self._make_rest_call('/_mapping', action_result)
+        ret_val, response = self._make_rest_call(f"/{index}/{es_type}/_msearch", action_result, data=body,
+                                                 headers={'Content-Type': 'application/x-ndjson'},
+                                                 params=params, method='post')
 
         # Process errors
         if phantom.is_fail(ret_val):
+
             # Dump error messages in the log
             self.debug_print(action_result.get_message())
             return action_result.get_status()
 
-        indices = list(response.keys())
+        total_hits = 0
+        timed_out = False
 
-        for index in indices:
+        for resp in response.get('responses', []):
 
-            data = {'index': index}
-            types = list(response[index]['mappings'].keys())
-            keep_types = True
-            if len(types) == 1 and '_doc' in types:
-                keep_types = False
+            if 'error' in resp:
+                action_result.add_data(resp)
+                return action_result.set_status(phantom.APP_ERROR, ELASTICSEARCH_ERR_FROM_SERVER.format(
+                    status=resp.get('status', 'unknown'), detail=json.dumps(resp['error'])))
 
-            if keep_types:
-                data['types'] = types
+            # Cap the hits of each response like the single-query path does, the msearch body
+            # arrives as one document so there is no streaming variant to lean on here
+            if max_hits is not None:
+                hits = resp.get('hits', {}).get('hits')
+                if hits and len(hits) > max_hits:
+                    resp['hits']['hits'] = hits[:max_hits]
 
-            action_result.add_data(data)
+            # es 7 reports hits.total as an object ({'value': N, 'relation': 'eq'}), earlier
+            # versions as a plain number, normalize before summing
+            total = resp.get('hits', {}).get('total', 0)
+            total_hits += total.get('value', 0) if isinstance(total, dict) else total
+            timed_out = timed_out or resp.get('timed_out', False)
 
-        action_result.update_summary({'total_indices': len(indices)})
+            action_result.add_data(resp)
+
+        action_result.update_summary({
+            ELASTICSEARCH_JSON_TOTAL_HITS: total_hits,
+            ELASTICSEARCH_JSON_TIMED_OUT: timed_out})
 
         # Set the Status
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _save_container(self, container_dict):
+    def _get_config(self, param: dict) -> bool:
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Connectivity
+        self.save_progress(phantom.APP_PROG_CONNECTING_TO_ELLIPSES, self._host)
+
+        # The flat _cat listing is 10-100x smaller than _mapping on clusters with many indices,
+        # so only pay for the full mapping when the caller actually asked for the types
+        include_types = param.get(ELASTICSEARCH_JSON_INCLUDE_TYPES, False)
+
+        if include_types:
+            endpoint = '/_mapping'
+            params = None
+        else:
+            endpoint = '/_cat/indices'
+            params = {'format': 'json', 'h': 'index,health,status'}
+
+        now = time.time()
+        cache_key = self._base_url + endpoint
+
+        with ElasticsearchConnector._mapping_cache_lock:
+            cached = ElasticsearchConnector._mapping_cache.get(cache_key)
+
+        if cached is not None and now < cached[1]:
+            # Fresh enough, rapid action storms coalesce onto one fetch
+            response = cached[0]
+        else:
+            # Make the rest endpoint call
+            ret_val, response = self._make_rest_call(endpoint, action_result, params=params)
+
+            # Process errors
+            if phantom.is_fail(ret_val):
+                # Dump error messages in the log
+                self.debug_print(action_result.get_message())
+                return action_result.get_status()
+
+            with ElasticsearchConnector._mapping_cache_lock:
+                ElasticsearchConnector._mapping_cache[cache_key] = (
+                    response, now + ELASTICSEARCH_MAPPING_CACHE_TTL)
+
+        if include_types:
+            # Iterate items() so each index is hashed once instead of a keys() pass followed by a
+            # response[index] lookup per index, which adds up on clusters with thousands of indices
+            for index, body in response.items():
+
+                data = {'index': index}
+                types = list(body['mappings'].keys())
+
+                if types != ['_doc']:
+                    data['types'] = types
+
+                action_result.add_data(data)
+        else:
+            # A flat array of {'index':..., 'health':..., 'status':...} entries
+            for entry in response:
+                action_result.add_data(entry)
+
+        action_result.update_summary({'total_indices': len(response)})
+
+        # Set the Status
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _save_container(self, container_dict: dict):
 
         config = self.get_config()
         container = container_dict.get('container')
@@ -290,7 +632,7 @@ class ElasticsearchConnector(BaseConnector):
 
         return self.save_container(container)
 
-    def _on_poll(self, param):
+    def _on_poll(self, param: dict) -> bool:
         container_count = param.get('container_count', 0)
 
         config = self.get_config()
@@ -347,7 +689,7 @@ class ElasticsearchConnector(BaseConnector):
 
         return self.set_status(phantom.APP_SUCCESS)
 
-    def handle_action(self, param):
+    def handle_action(self, param: dict) -> bool:
         """Function that handles all the actions"""
 
         # Get the action that we are supposed to carry out, set it in the connection result object
@@ -358,7 +700,10 @@ class ElasticsearchConnector(BaseConnector):
 
         # Bunch if if..elif to process actions
         if action == self.ACTION_ID_RUN_QUERY:
-            ret_val = self._run_query(param)
+            if param.get(ELASTICSEARCH_JSON_QUERIES):
+                ret_val = self._run_queries(param)
+            else:
+                ret_val = self._run_query(param)
         elif action == self.ACTION_ID_GET_CONFIG:
             ret_val = self._get_config(param)
         elif action == phantom.ACTION_ID_TEST_ASSET_CONNECTIVITY:
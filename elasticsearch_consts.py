@@ -17,14 +17,34 @@ ELASTICSEARCH_JSON_QUERY = "query"
 ELASTICSEARCH_JSON_INDEX = "index"
 ELASTICSEARCH_JSON_TYPE = "type"
 ELASTICSEARCH_JSON_ROUTING = "routing"
+ELASTICSEARCH_JSON_QUERIES = "queries"
 ELASTICSEARCH_JSON_TOTAL_HITS = "total_hits"
 ELASTICSEARCH_JSON_TIMED_OUT = "timed_out"
 
+ELASTICSEARCH_JSON_MAX_HITS = "max_hits"
+ELASTICSEARCH_JSON_SUMMARY_ONLY = "summary_only"
+ELASTICSEARCH_JSON_INCLUDE_TYPES = "include_types"
+ELASTICSEARCH_JSON_MAX_CONNECTIONS = "max_connections"
+
+ELASTICSEARCH_DEFAULT_POOL_SIZE = 20
+
+# Responses smaller than this are parsed in one go even when streaming was requested
+ELASTICSEARCH_STREAM_MIN_BYTES = 1024 * 1024
+
+# How long a fetched _mapping stays valid, in seconds
+ELASTICSEARCH_MAPPING_CACHE_TTL = 60
+
+# Request bodies larger than this are gzip-compressed before sending
+ELASTICSEARCH_GZIP_MIN_BYTES = 1024
+
 ELASTICSEARCH_ERR_CONNECTIVITY_TEST = "Test Connectivity Failed"
 ELASTICSEARCH_SUCC_CONNECTIVITY_TEST = "Test Connectivity Passed"
 ELASTICSEARCH_ERR_SERVER_CONNECTION = "Connection failed"
 ELASTICSEARCH_ERR_FROM_SERVER = "API failed, Status code: {status}, Detail: {detail}"
-ELASTICSEARCH_MSG_CLUSTER_HEALTH = "Querying cluster health to check connectivity"
-ELASTICSEARCH_ERR_API_UNSUPPORTED_METHOD = "Unsupported method"
+ELASTICSEARCH_MSG_CLUSTER_INFO = "Querying the cluster info endpoint to check connectivity"
+ELASTICSEARCH_MSG_CLUSTER_INFO_DETAILS = "Connected to cluster '{cluster_name}', version {version}"
+ELASTICSEARCH_ERR_NOT_ES = "Response did not contain the cluster name and version, is this an Elasticsearch instance?"
+ELASTICSEARCH_ERR_API_UNSUPPORTED_METHOD = "Unsupported method: {method}"
 ELASTICSEARCH_USING_BASE_URL = "Using url: {base_url}"
 ELASTICSEARCH_ERR_JSON_PARSE = "Unable to parse reply as a Json, raw string reply: '{raw_text}'"
+ELASTICSEARCH_ERR_INVALID_NAME = "Parameter '{name}' is not a valid Elasticsearch name"